@@ -1,8 +1,64 @@
+import codecs
+import selectors
 import socket
+import struct
 import threading
 import time
+from collections import deque
 from typing import Optional, Callable, Dict, List
 
+# Bound once at import: skips str.encode's per-call codec lookup on the
+# send hot path.
+_UTF8_ENCODE = codecs.getencoder("utf-8")
+
+# Wire format: each message is a 4-byte big-endian length followed by the
+# UTF-8 payload. Must match server.py.
+_STRUCT_I = struct.Struct(">I")
+
+# Last discovery result, kept briefly so reopening the connect dialog
+# doesn't redo a multi-second UDP listen: (monotonic timestamp, servers).
+_DISCOVERY_CACHE: Optional[tuple] = None
+_DISCOVERY_TTL = 10.0
+
+# One selector thread shared by every connected ChatClient: N clients
+# cost one listener thread (and one kernel wait) instead of N.
+_SELECTOR = selectors.DefaultSelector()
+_SELECTOR_LOCK = threading.Lock()
+_SELECTOR_THREAD: Optional[threading.Thread] = None
+
+
+def _selector_loop():
+    while True:
+        events = _SELECTOR.select(0.5)
+        for key, _ in events:
+            client = key.data
+            try:
+                client._feed()
+            except Exception as e:
+                if client.on_status:
+                    client.on_status(f"Listener error: {e}")
+                client._on_eof()
+
+
+def _register_client(client: "ChatClient"):
+    global _SELECTOR_THREAD
+    with _SELECTOR_LOCK:
+        # Idempotent: a second start_listening() on the same socket is a
+        # no-op, matching the old per-client thread's is_alive() guard.
+        if client.socket not in _SELECTOR.get_map():
+            _SELECTOR.register(client.socket, selectors.EVENT_READ, client)
+        if _SELECTOR_THREAD is None or not _SELECTOR_THREAD.is_alive():
+            _SELECTOR_THREAD = threading.Thread(target=_selector_loop, daemon=True)
+            _SELECTOR_THREAD.start()
+
+
+def _unregister_client(client: "ChatClient"):
+    with _SELECTOR_LOCK:
+        try:
+            _SELECTOR.unregister(client.socket)
+        except (KeyError, ValueError, OSError):
+            pass  # Never registered, or socket already closed
+
 
 class ChatClient:
     """
@@ -10,8 +66,27 @@ class ChatClient:
     Handles network communication only (no UI logic).
     """
 
-    BUFFER_SIZE = 1024
+    # Fixed attribute layout: smaller instances and LOAD_ATTR skips the
+    # per-instance dict probe, which also helps the hoisted-locals paths.
+    __slots__ = (
+        "host", "port", "username", "_username_bytes",
+        "tcp_nodelay", "sock_buf", "coalesce_sends",
+        "on_message", "on_status",
+        "socket", "is_connected",
+        "_rx_buf", "_rx_view", "_rx_bytes",
+        "_tx_queue", "_tx_cond", "_writer_thread",
+    )
+
+    BUFFER_SIZE = 16384
+    # Largest frame a peer may announce; a bogus length prefix would
+    # otherwise buffer forever. Must match server.py's MAX_FRAME.
+    MAX_FRAME = 64 * 1024
+    # Largest message body the server will rebroadcast: MAX_FRAME minus
+    # headroom for its "username: " prefix. Must match server.py's
+    # MAX_MESSAGE. Checked before sending so the server doesn't drop us.
+    MAX_MESSAGE = MAX_FRAME - 256
     BROADCAST_PORT = 9999  # UDP port for server discovery
+    MULTICAST_GROUP = "239.1.2.3"  # Discovery beacons are multicast here
 
     def __init__(
         self,
@@ -20,17 +95,38 @@ class ChatClient:
         username: Optional[str] = None,
         on_message: Optional[Callable[[str], None]] = None,
         on_status: Optional[Callable[[str], None]] = None,
+        tcp_nodelay: bool = True,
+        sock_buf: Optional[int] = 65536,
+        coalesce_sends: bool = False,
     ):
         self.host = host
         self.port = port
         self.username = username
+        # Encoded once here instead of on every use.
+        self._username_bytes = username.encode("utf-8") if username else b""
+        self.tcp_nodelay = tcp_nodelay
+        self.sock_buf = sock_buf  # None keeps kernel autotuning
+        self.coalesce_sends = coalesce_sends
 
         self.on_message = on_message
         self.on_status = on_status
 
         self.socket: Optional[socket.socket] = None
         self.is_connected = False
-        self.listener_thread: Optional[threading.Thread] = None
+
+        # Receive buffer, reused for the lifetime of the connection so
+        # each recv does not allocate a fresh bytes object.
+        self._rx_buf: Optional[bytearray] = None
+        self._rx_view: Optional[memoryview] = None
+        # Accumulator for partial frames: TCP is a byte stream, so one recv
+        # can hold half a message (or half a UTF-8 codepoint).
+        self._rx_bytes = bytearray()
+
+        # Outgoing frames queued for the coalescing writer (only used when
+        # coalesce_sends is set): rapid sends are joined into one sendall.
+        self._tx_queue: deque = deque()
+        self._tx_cond = threading.Condition()
+        self._writer_thread: Optional[threading.Thread] = None
 
     # ---------- SERVER DISCOVERY ----------
 
@@ -40,50 +136,139 @@ class ChatClient:
         Discover available chat servers on the local network.
         Returns dict of {ip: port} for available servers.
         """
+        global _DISCOVERY_CACHE
+
+        if _DISCOVERY_CACHE is not None:
+            age = time.monotonic() - _DISCOVERY_CACHE[0]
+            if age < _DISCOVERY_TTL and _DISCOVERY_CACHE[1]:
+                return dict(_DISCOVERY_CACHE[1])
+
         servers: Dict[str, int] = {}
         try:
             discover_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             discover_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            if hasattr(socket, "SO_REUSEPORT"):
+                discover_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
             discover_socket.bind(("", ChatClient.BROADCAST_PORT))
-            discover_socket.settimeout(timeout)
-            
-            start_time = time.time()
-            while time.time() - start_time < timeout:
-                try:
-                    data, addr = discover_socket.recvfrom(1024)
-                    message = data.decode("utf-8")
-                    
-                    if message.startswith("CHAT_SERVER|"):
-                        parts = message.split("|")
-                        if len(parts) == 3:
-                            server_ip = parts[1]
-                            server_port = int(parts[2])
-                            servers[server_ip] = server_port
-                except socket.timeout:
+
+            # Join the discovery multicast group: the kernel then only
+            # delivers beacons to sockets that subscribed, instead of
+            # waking every bound socket for every LAN broadcast.
+            # Best-effort: the join can fail where there is no multicast
+            # route (ENODEV on VPN-only setups), and the socket is already
+            # bound to receive the server's plain-broadcast fallback.
+            try:
+                mreq = struct.pack(
+                    "4sl",
+                    socket.inet_aton(ChatClient.MULTICAST_GROUP),
+                    socket.INADDR_ANY,
+                )
+                discover_socket.setsockopt(
+                    socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq
+                )
+            except OSError:
+                pass
+            discover_socket.setblocking(False)
+
+            # Wait on the selector (epoll on Linux) against a monotonic
+            # deadline instead of polling time.time() with a per-recv timeout.
+            sel = selectors.DefaultSelector()
+            sel.register(discover_socket, selectors.EVENT_READ)
+            deadline = time.monotonic() + timeout
+
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not sel.select(remaining):
                     break
-                except:
+                try:
+                    data, addr = discover_socket.recvfrom(2048)
+
+                    # Reject non-beacon datagrams on the raw bytes before
+                    # paying for any decode; noisy LANs are mostly misses.
+                    if not data.startswith(b"CHAT_SERVER|"):
+                        continue
+                    parts = data.split(b"|", 2)
+                    if len(parts) == 3:
+                        servers[parts[1].decode("ascii")] = int(parts[2])
+                except (OSError, ValueError):
                     continue
-                    
+
+            sel.close()
             discover_socket.close()
         except Exception as e:
             print(f"[DISCOVERY ERROR] {e}")
-        
+
+        if servers:
+            _DISCOVERY_CACHE = (time.monotonic(), dict(servers))
+
         return servers
 
+    @staticmethod
+    def discover_servers_async(
+        callback: Callable[[Dict[str, int]], None],
+        timeout: float = 3.0,
+    ):
+        """
+        Run discover_servers on a daemon thread and hand the result to
+        callback, so callers (e.g. the GUI) are never blocked.
+        """
+        threading.Thread(
+            target=lambda: callback(ChatClient.discover_servers(timeout)),
+            daemon=True
+        ).start()
+
     # ---------- CONNECTION ----------
 
+    def _open_connection(self) -> socket.socket:
+        """
+        Resolve the host and try each address (IPv6 and IPv4) in turn,
+        so a broken AAAA record falls through to IPv4 instead of eating
+        the whole connect timeout.
+        """
+        last_err: Optional[OSError] = None
+        for family, sock_type, proto, _, addr in socket.getaddrinfo(
+            self.host, self.port, type=socket.SOCK_STREAM
+        ):
+            sock = socket.socket(family, sock_type, proto)
+            try:
+                # Disable Nagle so small interactive messages go out
+                # immediately, and enlarge the kernel buffers so bursts
+                # drain in fewer recv()s.
+                if self.tcp_nodelay:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                if self.sock_buf is not None:
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.sock_buf)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.sock_buf)
+
+                # TCP Fast Open (Linux >= 4.11): lets the kernel carry the
+                # first write on the SYN, saving an RTT on repeat connects.
+                # Best-effort; silently unavailable elsewhere.
+                if hasattr(socket, "TCP_FASTOPEN_CONNECT"):
+                    try:
+                        sock.setsockopt(
+                            socket.IPPROTO_TCP, socket.TCP_FASTOPEN_CONNECT, 1
+                        )
+                    except OSError:
+                        pass
+
+                sock.settimeout(5)  # 5 second connection timeout
+                sock.connect(addr)
+                return sock
+            except OSError as e:
+                sock.close()
+                last_err = e
+
+        raise last_err if last_err else OSError("no addresses to connect to")
+
     def connect(self) -> bool:
         try:
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(5)  # 5 second connection timeout
-            
             if self.on_status:
                 self.on_status(f"Connecting to {self.host}:{self.port}...")
-            
-            self.socket.connect((self.host, self.port))
 
-            # Receive welcome message
-            welcome = self.socket.recv(self.BUFFER_SIZE).decode("utf-8")
+            self.socket = self._open_connection()
+
+            # Receive welcome message (one length-prefixed frame)
+            welcome = self._recv_frame().decode("utf-8")
 
             if self.on_message:
                 self.on_message(f"[SERVER] {welcome}")
@@ -92,10 +277,19 @@ class ChatClient:
                 raise ValueError("Username must be provided")
 
             # Send username to server (use sendall for full delivery)
-            self.socket.sendall(self.username.encode("utf-8"))
+            self.socket.sendall(
+                _STRUCT_I.pack(len(self._username_bytes)) + self._username_bytes
+            )
             self.is_connected = True
             self.socket.settimeout(None)  # Switch to blocking mode for listening
 
+            if self.coalesce_sends:
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop,
+                    daemon=True
+                )
+                self._writer_thread.start()
+
             if self.on_status:
                 self.on_status(f"Connected as {self.username}")
 
@@ -117,40 +311,91 @@ class ChatClient:
             self.is_connected = False
             return False
 
+    def _recv_exact(self, n: int) -> bytes:
+        """Blocking read of exactly n bytes (only used before listening)."""
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.socket.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("Connection closed mid-frame")
+            buf += chunk
+        return bytes(buf)
+
+    def _recv_frame(self) -> bytes:
+        (length,) = _STRUCT_I.unpack(self._recv_exact(4))
+        if length > self.MAX_FRAME:
+            raise ConnectionError(f"Oversized frame ({length} bytes)")
+        return self._recv_exact(length)
+
     # ---------- LISTENER ----------
 
     def start_listening(self):
-        if self.listener_thread and self.listener_thread.is_alive():
+        if not self.is_connected or not self.socket:
             return
 
-        self.listener_thread = threading.Thread(
-            target=self._listen_loop,
-            daemon=True
-        )
-        self.listener_thread.start()
+        if self._rx_buf is None:
+            self._rx_buf = bytearray(self.BUFFER_SIZE)
+            self._rx_view = memoryview(self._rx_buf)
+        self._rx_bytes = bytearray()
 
-    def _listen_loop(self):
-        try:
-            while self.is_connected and self.socket:
-                data = self.socket.recv(self.BUFFER_SIZE)
-                if not data:
-                    break
-
-                message = data.decode("utf-8")
-
-                if self.on_message:
-                    self.on_message(message)
+        _register_client(self)
 
+    def _feed(self):
+        """One readable wakeup from the shared selector thread."""
+        try:
+            n = self.socket.recv_into(self._rx_view)
+        except (BlockingIOError, InterruptedError):
+            return  # Spurious wakeup
         except OSError:
-            pass
-        except Exception as e:
-            if self.on_status:
-                self.on_status(f"Listener error: {e}")
+            n = 0
 
-        finally:
-            self.is_connected = False
-            if self.on_status:
-                self.on_status("Disconnected from server")
+        if not n:
+            self._on_eof()
+            return
+
+        # Hoist the per-frame attribute lookups to locals: LOAD_FAST
+        # instead of a dict probe on every pass through the loop.
+        on_message = self.on_message
+        unpack_from = _STRUCT_I.unpack_from
+        max_frame = self.MAX_FRAME
+        # Accumulate and deliver only complete frames (4-byte length +
+        # payload); partial input is carried to the next recv. del keeps
+        # the same bytearray alive instead of copying the tail per frame.
+        rx_bytes = self._rx_bytes
+        rx_bytes += self._rx_view[:n]
+        while len(rx_bytes) >= 4:
+            (length,) = unpack_from(rx_bytes)
+            if length > max_frame:
+                if self.on_status:
+                    self.on_status(f"Protocol error: oversized frame ({length} bytes)")
+                self._on_eof()
+                return
+            if len(rx_bytes) - 4 < length:
+                break
+            frame = bytes(rx_bytes[4:4 + length])
+            del rx_bytes[:4 + length]
+            if frame and on_message:
+                # Chat traffic is overwhelmingly ASCII; CPython's
+                # ascii decoder is a straight memcpy-style path,
+                # cheaper than running the UTF-8 validator.
+                if frame.isascii():
+                    on_message(frame.decode("ascii"))
+                else:
+                    on_message(frame.decode("utf-8"))
+
+    def _on_eof(self):
+        _unregister_client(self)
+        self.is_connected = False
+        # Close the socket so the server sees EOF now, instead of keeping
+        # queueing broadcasts to a dead listener until back-pressure
+        # finally drops it.
+        if self.socket:
+            try:
+                self.socket.close()
+            except OSError:
+                pass
+        if self.on_status:
+            self.on_status("Disconnected from server")
 
     # ---------- SEND ----------
 
@@ -158,19 +403,68 @@ class ChatClient:
         if not self.is_connected or not self.socket:
             return False
 
+        body, _ = _UTF8_ENCODE(message)
+        if len(body) > self.MAX_MESSAGE:
+            if self.on_status:
+                self.on_status(
+                    f"Message too long ({len(body)} bytes, max {self.MAX_MESSAGE})"
+                )
+            return False
+        payload = _STRUCT_I.pack(len(body)) + body
+
+        if self.coalesce_sends:
+            with self._tx_cond:
+                self._tx_queue.append(payload)
+                self._tx_cond.notify()
+            return True
+
         try:
-            self.socket.send(message.encode("utf-8"))
+            self.socket.sendall(payload)
             return True
-        except Exception as e:
+        except (BrokenPipeError, ConnectionResetError):
+            # Normal peer-closure path: no need to materialize a traceback
+            if self.on_status:
+                self.on_status("Send failed: connection closed by server")
+            self.is_connected = False
+            return False
+        except OSError as e:
             if self.on_status:
-                self.on_status(f"Send failed: {e}")
+                self.on_status(f"Send failed: {type(e).__name__}: {e}")
             self.is_connected = False
             return False
 
+    def _writer_loop(self):
+        """Drain queued frames and push them in one sendall per wakeup."""
+        while self.is_connected and self.socket:
+            with self._tx_cond:
+                while not self._tx_queue and self.is_connected:
+                    self._tx_cond.wait(0.5)
+                batch = b"".join(self._tx_queue)
+                self._tx_queue.clear()
+
+            if not batch:
+                continue
+
+            try:
+                self.socket.sendall(batch)
+            except (BrokenPipeError, ConnectionResetError):
+                if self.on_status:
+                    self.on_status("Send failed: connection closed by server")
+                self.is_connected = False
+                break
+            except OSError as e:
+                if self.on_status:
+                    self.on_status(f"Send failed: {type(e).__name__}: {e}")
+                self.is_connected = False
+                break
+
     # ---------- DISCONNECT ----------
 
     def disconnect(self):
         self.is_connected = False
+        _unregister_client(self)
+        with self._tx_cond:
+            self._tx_cond.notify()  # Wake the writer so it can exit
         if self.socket:
             try:
                 self.socket.close()
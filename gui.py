@@ -1,12 +1,39 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
-import datetime
+import time
+from collections import deque
+from contextlib import contextmanager
 
 from client import ChatClient
 
 
+@contextmanager
+def _editable(widget: tk.Text):
+    """Temporarily lift a read-only Text widget's state for inserts.
+
+    One configure pair per with-block, however many inserts happen inside.
+    """
+    widget.configure(state="normal")
+    try:
+        yield
+    finally:
+        widget.configure(state="disabled")
+
+
 class ChatGUI:
+    # Oldest lines are dropped past these points so a long-running session
+    # keeps bounded memory and redraw cost. Trimming waits for TRIM_SLACK
+    # extra lines of headroom so the delete doesn't run on every append.
+    CHAT_MAX_LINES = 2000
+    DEBUG_MAX_LINES = 200
+    TRIM_SLACK = 256
+
+    # How often the UI queues are drained; bounds hand-off latency from
+    # the listener thread to the chat box while coalescing bursts into
+    # one Tk layout pass per tick.
+    DRAIN_INTERVAL_MS = 30
+
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("TCP Network Chat")
@@ -16,6 +43,23 @@ class ChatGUI:
         self.client: ChatClient | None = None
         self.username: str | None = None
 
+        # Updates from the listener thread land in these deques (append is
+        # atomic under the GIL, so no lock) and are drained on the Tk
+        # thread in one batch per drain tick: a chatty server triggers one
+        # layout pass per widget per tick instead of one per message.
+        self._msg_queue: deque = deque()
+        self._debug_queue: deque = deque()
+        self._status_queue: deque = deque()
+        # Self-rescheduling drain: a bounded hand-off latency per tick,
+        # instead of the implementation-defined timing of after(0, ...)
+        # enqueues from another thread.
+        self.root.after(self.DRAIN_INTERVAL_MS, self._periodic_drain)
+
+        # Timestamps only change once a second, so cache the formatted
+        # string instead of running strftime per message.
+        self._last_ts_sec = 0
+        self._last_ts_str = ""
+
         self._setup_style()
         self._build_ui()
 
@@ -84,6 +128,16 @@ class ChatGUI:
         scrollbar.pack(side="right", fill="y")
         self.chat_box.config(yscrollcommand=scrollbar.set)
 
+        # Timestamp and sender get their style from tags instead of being
+        # baked into one concatenated string per message.
+        self.chat_box.tag_configure("ts", foreground="#888888")
+        self.chat_box.tag_configure("sender", font=("Segoe UI", 10, "bold"))
+
+        # Pre-bound widget methods for the append hot path: one LOAD_ATTR
+        # on self instead of an attribute chain through the widget per call.
+        self._chat_insert = self.chat_box.insert
+        self._chat_see = self.chat_box.see
+
         # Input area - more prominent
         input_label = ttk.Label(main_frame, text="Your message:", font=("Segoe UI", 9, "bold"))
         input_label.pack(anchor="w", pady=(10, 4))
@@ -113,9 +167,21 @@ class ChatGUI:
         )
         self.send_button.pack(side="right")
 
-        # Debug log panel (smaller, at bottom)
+        # Debug log panel (smaller, at bottom). Off by default: every
+        # message costs a second Text insert when enabled, so production
+        # runs skip the widget work (and its layout) entirely.
         log_frame = ttk.LabelFrame(self.root, text="Debug Log", padding=6)
         log_frame.pack(fill="x", padx=10, pady=(0, 10))
+
+        self.debug_enabled = False
+        self._debug_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            log_frame,
+            text="Enable",
+            variable=self._debug_var,
+            command=self._toggle_debug
+        ).pack(anchor="w")
+
         self.debug_log = tk.Text(
             log_frame,
             height=3,
@@ -125,7 +191,10 @@ class ChatGUI:
             bg="#1e1e1e",
             fg="#00ff00"
         )
-        self.debug_log.pack(fill="both", expand=True)
+        # Packed on demand by _toggle_debug; hidden widgets cost no layout
+
+        self._debug_insert = self.debug_log.insert
+        self._debug_see = self.debug_log.see
 
         # Connect popup
         self._show_connect_popup()
@@ -155,27 +224,44 @@ class ChatGUI:
         server_combo.pack(side="left", fill="x", expand=True, padx=(0, 8))
         server_combo.insert(0, "Searching...")
         
-        def refresh_servers():
-            refresh_btn.config(state="disabled", text="Searching...")
-            popup.update()
-            
-            servers = ChatClient.discover_servers(timeout=2.0)
+        # Debounce state for the refresh button: one scan in flight at a
+        # time, and at most one kick-off per 250ms of click-spam.
+        refresh_state = {"pending": False, "last": 0.0}
+
+        def apply_servers(servers):
+            # Runs on the Tk thread (marshalled via root.after below)
             if servers:
                 server_list = [f"{ip}:{port}" for ip, port in servers.items()]
                 server_combo.config(values=server_list)
-                if server_list:
-                    server_combo.current(0)
+                server_combo.current(0)
             else:
                 server_combo.config(values=["No servers found"])
                 server_combo.current(0)
-            
+
+            refresh_state["pending"] = False
             refresh_btn.config(state="normal", text="🔄 Refresh")
-        
+
+        def refresh_servers():
+            now = time.monotonic()
+            if refresh_state["pending"] or now - refresh_state["last"] < 0.25:
+                return
+            refresh_state["pending"] = True
+            refresh_state["last"] = now
+
+            # Tk widgets are single-threaded: only the blocking UDP listen
+            # runs on a worker; every widget update is marshalled back
+            # onto the Tk thread with root.after.
+            refresh_btn.config(state="disabled", text="Searching...")
+            ChatClient.discover_servers_async(
+                lambda servers: self.root.after(0, apply_servers, servers),
+                timeout=2.0,
+            )
+
         refresh_btn = ttk.Button(local_frame, text="🔄 Refresh", command=refresh_servers, width=12)
         refresh_btn.pack(side="right")
-        
-        # Auto-refresh on startup
-        threading.Thread(target=refresh_servers, daemon=True).start()
+
+        # Auto-refresh once the popup is on screen
+        self.root.after(100, refresh_servers)
 
         # Manual Entry Section
         manual_frame = ttk.LabelFrame(frame, text="Other Networks (Manual Entry)", padding=8)
@@ -266,50 +352,130 @@ class ChatGUI:
 
     # ---------- CALLBACKS ----------
 
+    def _now_hms(self) -> str:
+        sec = int(time.time())
+        if sec != self._last_ts_sec:
+            self._last_ts_sec = sec
+            self._last_ts_str = time.strftime("%H:%M:%S", time.localtime(sec))
+        return self._last_ts_str
+
     def _on_message(self, message: str):
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        timestamp = self._now_hms()
         
         # Parse message format "username: message" or system messages "[SYSTEM] ..."
-        formatted_message = message
-        if not message.startswith("["):
-            # Regular message from another user
-            if ": " in message:
-                sender, msg_content = message.split(": ", 1)
-                formatted_message = f"[{timestamp}] {sender}: {msg_content}"
-            else:
-                formatted_message = f"[{timestamp}] {message}"
-        else:
+        # message[:1] skips the startswith method lookup for a 1-char test,
+        # and partition scans the payload once where the old startswith /
+        # "in" / split chain scanned it three times.
+        if message[:1] == "[":
             # System message
-            formatted_message = f"[{timestamp}] {message}"
-        
-        self.root.after(
-            0,
-            lambda: self._append_message(formatted_message)
-        )
-        self.root.after(0, lambda: self._append_debug(f"MSG: {message}"))
+            parts = (f"[{timestamp}] ", None, message + "\n")
+        else:
+            sender, sep, body = message.partition(": ")
+            if sep:
+                parts = (f"[{timestamp}] ", f"{sender}: ", body + "\n")
+            else:
+                parts = (f"[{timestamp}] ", None, message + "\n")
+
+        self._msg_queue.append(parts)
+        if self.debug_enabled:
+            self._debug_queue.append(f"MSG: {message}\n")
 
     def _on_status(self, status: str):
-        self.root.after(0, lambda: self._update_status(status))
-        self.root.after(0, lambda: self._append_debug(f"STATUS: {status}"))
+        self._status_queue.append(status)
+        if self.debug_enabled:
+            self._debug_queue.append(f"STATUS: {status}\n")
+
+    def _toggle_debug(self):
+        self.debug_enabled = self._debug_var.get()
+        if self.debug_enabled:
+            self.debug_log.pack(fill="both", expand=True)
+        else:
+            self.debug_log.pack_forget()
+            self._debug_queue.clear()
 
     def _append_debug(self, text: str):
+        """Insert already-newline-terminated text into the debug log."""
+        if not self.debug_enabled:
+            return
         try:
-            self.debug_log.configure(state="normal")
-            self.debug_log.insert("end", text + "\n")
-            self.debug_log.see("end")
-            self.debug_log.configure(state="disabled")
+            with _editable(self.debug_log):
+                self._debug_insert("end", text)
+                self._trim(self.debug_log, self.DEBUG_MAX_LINES)
+            self._debug_see("end")
         except Exception:
             pass
 
-    def _append_message(self, message: str):
-        self.chat_box.configure(state="normal")
-        self.chat_box.insert("end", message + "\n")
-        self.chat_box.configure(state="disabled")
-        self.chat_box.see("end")
+    def _periodic_drain(self):
+        self._drain_ui_queues()
+        self.root.after(self.DRAIN_INTERVAL_MS, self._periodic_drain)
+
+    @staticmethod
+    def _pop_all(q: deque) -> list[str]:
+        items: list[str] = []
+        popleft = q.popleft
+        while q:
+            try:
+                items.append(popleft())
+            except IndexError:
+                break
+        return items
+
+    def _drain_ui_queues(self):
+        batch = self._pop_all(self._msg_queue)
+        if batch:
+            with _editable(self.chat_box):
+                self._insert_parts(batch)
+                self._trim_chat()
+            self._chat_see("end")
+
+        debug_batch = self._pop_all(self._debug_queue)
+        if debug_batch:
+            self._append_debug("".join(debug_batch))
+
+        statuses = self._pop_all(self._status_queue)
+        if statuses:
+            # Only the latest status matters for the label
+            self._update_status(statuses[-1])
+
+    @classmethod
+    def _trim(cls, widget: tk.Text, max_lines: int):
+        """Drop the oldest lines once the widget exceeds max_lines.
+
+        Must be called while the widget state is "normal".
+        """
+        end_line = int(widget.index("end-1c").split(".")[0])
+        if end_line > max_lines + cls.TRIM_SLACK:
+            widget.delete("1.0", f"{end_line - max_lines}.0")
+
+    def _trim_chat(self):
+        self._trim(self.chat_box, self.CHAT_MAX_LINES)
+
+    def _insert_parts(self, batch):
+        """Insert (timestamp, sender, body) triples in one tagged insert.
+
+        Tk's insert takes alternating chars/tags arguments, so a whole
+        batch goes through a single C call with per-field styling and no
+        f-string concatenation per message.
+        """
+        args = []
+        for ts_part, sender_part, body in batch:
+            args += (ts_part, "ts")
+            if sender_part is not None:
+                args += (sender_part, "sender")
+            args += (body, ())
+        self._chat_insert("end", *args)
+
+    def _append_message(self, ts_part: str, sender_part, body: str):
+        with _editable(self.chat_box):
+            self._insert_parts([(ts_part, sender_part, body)])
+            self._trim_chat()
+        self._chat_see("end")
 
     def _update_status(self, status: str):
         self.status_label.config(text=status)
-        if status.lower().startswith("connected"):
+        # ChatClient emits fixed status prefixes, so match them directly
+        # instead of allocating a lowercased copy per update.
+        if status.startswith(("Connected", "connected")):
             self.status_label.config(foreground="green")
         else:
             self.status_label.config(foreground="red")
@@ -330,10 +496,11 @@ class ChatGUI:
         if not message:
             return
 
-        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-        self.root.after(
-            0,
-            lambda: self._append_message(f"[{timestamp}] {self.username} (You): {message}")
+        timestamp = self._now_hms()
+        # Invoked from the button/Return binding, so we are already on the
+        # Tk thread: append directly, no after() round-trip needed.
+        self._append_message(
+            f"[{timestamp}] ", f"{self.username} (You): ", message + "\n"
         )
         self.client.send_message(message)
         self.message_entry.delete(0, "end")
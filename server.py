@@ -1,13 +1,49 @@
+import selectors
 import socket
+import struct
 import threading
 import time
 from typing import Dict, Optional
 
+# Wire format: each message is a 4-byte big-endian length followed by the
+# UTF-8 payload. Must match client.py.
+_STRUCT_I = struct.Struct(">I")
+
+
+def _frame(body: bytes) -> bytes:
+    return _STRUCT_I.pack(len(body)) + body
+
+
+# Pre-encoded pieces of the system messages, so join/leave events build
+# their payload with a bytes concat instead of a full str encode.
+_SYS_PREFIX = b"[SYSTEM] "
+_JOINED = b" joined the chat"
+_LEFT = b" left the chat"
+
 
 HOST = "0.0.0.0"   # Listen on all network interfaces
 PORT = 10000
-BUFFER_SIZE = 1024
+BUFFER_SIZE = 8192
+# A consumer that falls this many bytes behind is dropped rather than
+# letting its outbound buffer grow without bound.
+MAX_TX_BUFFER = 1024 * 1024
+# Largest frame a peer may announce. A non-framing peer (or garbage) has
+# its first bytes read as a huge length, which would otherwise buffer in
+# rx forever waiting for a frame that never completes. Must match
+# ChatClient.MAX_FRAME.
+MAX_FRAME = 64 * 1024
+# Inbound messages are rebroadcast as "username: message", so they get a
+# tighter cap that leaves headroom for the worst-case prefix — otherwise
+# a maximum-size inbound frame would produce an outbound frame over
+# MAX_FRAME and every recipient would drop the connection as a protocol
+# error. MAX_MESSAGE must match ChatClient.MAX_MESSAGE.
+MAX_USERNAME = 63  # chars; <= 252 bytes in UTF-8
+MAX_MESSAGE = MAX_FRAME - 256
+# Cap on concurrent connections: a connect storm gets refused instead of
+# growing per-connection state without bound.
+MAX_CLIENTS = 256
 BROADCAST_PORT = 9999  # UDP port for server discovery
+MULTICAST_GROUP = "239.1.2.3"  # Must match ChatClient.MULTICAST_GROUP
 
 
 def get_local_ip():
@@ -23,21 +59,50 @@ def get_local_ip():
         return "127.0.0.1"
 
 
+class ClientState:
+    """Per-connection state for the event loop: identity plus rx/tx buffers."""
+
+    __slots__ = ("sock", "addr", "username", "rx", "tx")
+
+    def __init__(self, sock: socket.socket, addr):
+        self.sock = sock
+        self.addr = addr
+        self.username: Optional[str] = None  # Set by the first frame
+        self.rx = bytearray()  # Inbound bytes awaiting a frame terminator
+        self.tx = bytearray()  # Outbound bytes the kernel hasn't taken yet
+
+
 class ChatServer:
     """
     Multi-client TCP chat server.
-    Handles connections, message broadcasting, and graceful shutdown.
+    Runs all connections on a single selectors-based event loop (epoll on
+    Linux): non-blocking sockets, length-prefixed messages, and per-
+    connection outbound buffers instead of one thread per client.
     """
 
-    def __init__(self, host: str = HOST, port: int = PORT, backlog: int = 5): 
+    def __init__(self, host: str = HOST, port: int = PORT, backlog: int = 5):
         self.host = host
         self.port = port
         self.backlog = backlog  # Number of pending connections to queue
         self.server_socket: Optional[socket.socket] = None
-        self.clients: Dict[socket.socket, str] = {}  # socket -> username
+        self.selector: Optional[selectors.BaseSelector] = None
+        # socket -> username. Copy-on-write: mutators build a new dict
+        # under self.lock and swap it in; broadcast just reads the current
+        # reference (assignment is atomic under the GIL), so the hot path
+        # never takes the lock.
+        self.clients: Dict[socket.socket, str] = {}
+        self._conns: Dict[socket.socket, ClientState] = {}
         self.lock = threading.Lock()
         self.running = True
         self.broadcast_thread: Optional[threading.Thread] = None
+        # Scratch receive buffer shared by every connection: the event
+        # loop reads one socket at a time, so a single bytearray serves
+        # them all and recv allocates nothing per call.
+        self._rx_scratch = bytearray(BUFFER_SIZE)
+        self._rx_view = memoryview(self._rx_scratch)
+        # Resolved once: the UDP-connect trick costs a socket and a route
+        # lookup, and the address doesn't change for the server's lifetime.
+        self._local_ip = get_local_ip()
 
     # ---------- START ----------
 
@@ -47,8 +112,12 @@ class ChatServer:
             self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.server_socket.bind((self.host, self.port))
             self.server_socket.listen(self.backlog)
+            self.server_socket.setblocking(False)
 
-            local_ip = get_local_ip()
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.server_socket, selectors.EVENT_READ, None)
+
+            local_ip = self._local_ip
             print(f"\n{'='*60}")
             print(f"[SERVER] Listening on {self.host}:{self.port}")
             print(f"[SERVER] Server IP for clients: {local_ip}:{self.port}")
@@ -64,15 +133,16 @@ class ChatServer:
             self.broadcast_thread.start()
 
             while self.running:
-                client_socket, client_address = self.server_socket.accept()
-                print(f"[NEW CONNECTION] {client_address}")
-
-                handler = threading.Thread(
-                    target=self._handle_client,
-                    args=(client_socket, client_address),
-                    daemon=True
-                )
-                handler.start()
+                events = self.selector.select(0.5)
+                for key, mask in events:
+                    if key.data is None:
+                        self._accept()
+                    else:
+                        state: ClientState = key.data
+                        if mask & selectors.EVENT_READ:
+                            self._on_readable(state)
+                        if mask & selectors.EVENT_WRITE and state.sock in self._conns:
+                            self._on_writable(state)
 
         except KeyboardInterrupt:
             print("\n[SERVER] Shutdown requested by user")
@@ -91,12 +161,17 @@ class ChatServer:
             broadcast_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             broadcast_socket.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-            
+            # Beacons stay on the local network segment
+            broadcast_socket.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)
+
             message = f"CHAT_SERVER|{local_ip}|{self.port}".encode("utf-8")
-            
+
             while self.running:
                 try:
-                    # Broadcast to all devices on the network
+                    # Multicast so only subscribed discovery sockets are
+                    # woken; keep the plain broadcast as a fallback for
+                    # networks that filter multicast.
+                    broadcast_socket.sendto(message, (MULTICAST_GROUP, BROADCAST_PORT))
                     broadcast_socket.sendto(message, ("<broadcast>", BROADCAST_PORT))
                 except:
                     pass
@@ -108,83 +183,207 @@ class ChatServer:
 
     # ---------- CLIENT HANDLING ----------
 
-    def _handle_client(self, client_socket: socket.socket, client_address):
-        username = None
+    def _accept(self):
         try:
-            # Welcome + username
-            client_socket.send(b"Welcome! Please enter your username")
-            username = client_socket.recv(BUFFER_SIZE).decode("utf-8").strip()
+            client_socket, client_address = self.server_socket.accept()
+        except OSError:
+            return
 
-            if not username:
-                return
+        if len(self._conns) >= MAX_CLIENTS:
+            print(f"[REFUSED] {client_address}: server full")
+            try:
+                client_socket.close()
+            except OSError:
+                pass
+            return
 
-            with self.lock:
-                self.clients[client_socket] = username
+        print(f"[NEW CONNECTION] {client_address}")
+        client_socket.setblocking(False)
+        # Ship each small broadcast write immediately instead of letting
+        # Nagle hold it for coalescing, give bursts kernel-buffer headroom,
+        # and let keepalive reap silently vanished peers.
+        client_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 64 * 1024)
+        client_socket.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
 
-            print(f"[USER JOINED] {username} from {client_address}")
-            self.broadcast(f"[SYSTEM] {username} joined the chat", exclude=client_socket)
+        state = ClientState(client_socket, client_address)
+        self._conns[client_socket] = state
+        self.selector.register(client_socket, selectors.EVENT_READ, state)
 
-            # Message loop
-            while True:
-                data = client_socket.recv(BUFFER_SIZE)
-                if not data:
-                    break
+        self._send_to(state, _frame(b"Welcome! Please enter your username"))
 
-                message = data.decode("utf-8")
-                print(f"[{username}] {message}")
-                self.broadcast(f"{username}: {message}", exclude=client_socket)
+    def _on_readable(self, state: ClientState):
+        try:
+            n = state.sock.recv_into(self._rx_view)
+        except BlockingIOError:
+            return
+        except OSError:
+            self._disconnect_client(state.sock)
+            return
+
+        if not n:
+            self._disconnect_client(state.sock)
+            return
+
+        # Deliver only complete frames (4-byte length + payload); partial
+        # input stays buffered until the next recv. del keeps the same
+        # bytearray alive instead of copying the tail per frame.
+        rx = state.rx
+        rx += self._rx_view[:n]
+        while len(rx) >= 4:
+            (length,) = _STRUCT_I.unpack_from(rx)
+            if length > MAX_FRAME:
+                print(f"[DROPPED] {state.username or state.addr}: "
+                      f"oversized frame ({length} bytes)")
+                self._disconnect_client(state.sock)
+                return
+            if len(rx) - 4 < length:
+                break
+            frame = bytes(rx[4:4 + length])
+            del rx[:4 + length]
+            self._on_frame(state, frame)
+            if state.sock not in self._conns:
+                return  # Frame handling dropped the connection
+
+    def _on_frame(self, state: ClientState, frame: bytes):
+        # errors="replace": a malformed byte becomes U+FFFD instead of an
+        # exception unwinding the event loop and dropping the client.
+        if state.username is None:
+            username = str(frame, "utf-8", "replace").strip()[:MAX_USERNAME]
+            if not username:
+                self._disconnect_client(state.sock)
+                return
 
-        except Exception as e:
-            print(f"[ERROR] {username or 'Unknown'}: {e}")
+            state.username = username
+            with self.lock:
+                new_clients = dict(self.clients)
+                new_clients[state.sock] = username
+                self.clients = new_clients
+
+            print(f"[USER JOINED] {username} from {state.addr}")
+            self.broadcast(
+                _SYS_PREFIX + username.encode("utf-8") + _JOINED,
+                exclude=state.sock,
+            )
+            return
+
+        if not frame:
+            return
+
+        if len(frame) > MAX_MESSAGE:
+            print(f"[DROPPED] {state.username}: "
+                  f"oversized message ({len(frame)} bytes)")
+            self._disconnect_client(state.sock)
+            return
+
+        message = str(frame, "utf-8", "replace")
+        print(f"[{state.username}] {message}")
+        self.broadcast(f"{state.username}: {message}", exclude=state.sock)
+
+    # ---------- WRITES ----------
+
+    def _send_to(self, state: ClientState, payload: bytes) -> bool:
+        """Queue payload on the connection and flush what the kernel will
+        take now; leftovers wait for EVENT_WRITE. Returns False if the
+        socket failed."""
+        state.tx += payload
+        if len(state.tx) > MAX_TX_BUFFER:
+            # Back-pressure: this consumer is too slow to keep up, and
+            # buffering for it would eat memory for everyone else.
+            print(f"[DROPPED] {state.username or state.addr}: send buffer full")
+            self._disconnect_client(state.sock)
+            return False
+        return self._flush(state)
+
+    def _flush(self, state: ClientState) -> bool:
+        try:
+            sent = state.sock.send(state.tx)
+            del state.tx[:sent]
+        except BlockingIOError:
+            pass
+        except OSError:
+            self._disconnect_client(state.sock)
+            return False
 
-        finally:
-            self._disconnect_client(client_socket)
+        events = selectors.EVENT_READ
+        if state.tx:
+            events |= selectors.EVENT_WRITE
+        try:
+            self.selector.modify(state.sock, events, state)
+        except (KeyError, ValueError):
+            pass
+        return True
+
+    def _on_writable(self, state: ClientState):
+        self._flush(state)
 
     # ---------- BROADCAST ----------
 
-    def broadcast(self, message: str, exclude: Optional[socket.socket] = None):
-        with self.lock:
-            for client in list(self.clients.keys()):
-                if client != exclude:
-                    try:
-                        client.send(message.encode("utf-8"))
-                    except:
-                        pass
+    def broadcast(self, message: "str | bytes", exclude: Optional[socket.socket] = None):
+        # Encode and frame once: the same immutable bytes object is queued
+        # for every recipient (pre-encoded system messages skip the encode
+        # entirely). Snapshot the targets because a failed send drops the
+        # client mid-iteration.
+        body = message if isinstance(message, bytes) else message.encode("utf-8")
+        payload = _frame(body)
+        # Lock-free read: grab the current snapshot (the dict is replaced,
+        # never mutated in place) and drop the exclude socket with a
+        # C-level dict_keys set difference.
+        clients = self.clients
+        targets = clients.keys() - ({exclude} if exclude else set())
+
+        for client in targets:
+            state = self._conns.get(client)
+            if state is not None:
+                self._send_to(state, payload)
 
     # ---------- DISCONNECT ----------
 
     def _disconnect_client(self, client_socket: socket.socket):
-        with self.lock:
-            username = self.clients.pop(client_socket, None)
+        self._conns.pop(client_socket, None)
+        try:
+            self.selector.unregister(client_socket)
+        except (KeyError, ValueError):
+            pass
 
-        if username:
-            print(f"[USER LEFT] {username}")
-            self.broadcast(f"[SYSTEM] {username} left the chat")
+        with self.lock:
+            new_clients = dict(self.clients)
+            username = new_clients.pop(client_socket, None)
+            self.clients = new_clients
 
         try:
             client_socket.close()
-        except:
+        except OSError:
             pass
 
+        if username:
+            print(f"[USER LEFT] {username}")
+            self.broadcast(_SYS_PREFIX + username.encode("utf-8") + _LEFT)
+
     # ---------- SHUTDOWN ----------
 
     def shutdown(self):
         self.running = False
 
         with self.lock:
-            for client in self.clients:
-                try:
-                    client.close()
-                except:
-                    pass
-            self.clients.clear()
+            clients = self.clients
+            self.clients = {}
+        for client in clients:
+            try:
+                client.close()
+            except OSError:
+                pass
+        self._conns.clear()
 
         if self.server_socket:
             try:
                 self.server_socket.close()
-            except:
+            except OSError:
                 pass
 
+        if self.selector:
+            self.selector.close()
+
         print("[SERVER] Shutdown complete.")
 
 